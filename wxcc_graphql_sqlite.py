@@ -6,11 +6,16 @@ This script executes GraphQL queries against the Webex Contact Center Search API
 and stores the results in a SQLite database.
 """
 
-import sqlite3
+import os
+import apsw
 import requests
-import json
+import orjson
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Any, Optional
 import logging
 
@@ -23,24 +28,118 @@ ACCESS_TOKEN = 'ACCESS_TOKEN_HERE'
 CONFIG = {
     'base_url': 'https://api.wxcc-us1.cisco.com',  # Change to your data center URL
     'access_token': ACCESS_TOKEN,      # Your OAuth2 access token
-    'org_id': ACCESS_TOKEN.split("_")[-1],                  # Your organization ID
+    'org_id': None,                                # Your organization ID (defaults to the token's suffix)
     'db_path': 'webex_cc_data.db',                 # SQLite database file path
-    'days_back': 7                                 # Number of days to extract data for
+    'days_back': 7,                                # Number of days to extract data for
+    'bulk_rebuild': False,                         # Skip the rollback journal when loading a new database file
+    'store_raw_data': True,                        # Keep the raw JSON record alongside the parsed columns
+    'compress_raw_data': False                     # Store raw_data as zlib-compressed JSON BLOBs
 }
 
+# SQL statements - built once at import so the connection's statement cache stays warm
+TASK_INSERT_SQL = '''
+    INSERT OR REPLACE INTO tasks (id, raw_data)
+    VALUES (?, ?)
+'''
+
+TASK_ACTIVITY_INSERT_SQL = '''
+    INSERT OR REPLACE INTO task_activities (
+        id, task_id, is_active, created_time, ended_time, agent_id, agent_name,
+        agent_phone_number, agent_session_id, agent_channel_id, entrypoint_id,
+        entrypoint_name, queue_id, queue_name, site_id, site_name, team_id,
+        team_name, transfer_type, activity_type, activity_name, event_name,
+        previous_state, next_state, consult_ep_id, consult_ep_name,
+        child_contact_id, child_contact_type, duration,
+        destination_agent_phone_number, destination_agent_id, destination_agent_name,
+        destination_agent_session_id, destination_agent_channel_id,
+        destination_agent_team_id, destination_agent_team_name,
+        destination_queue_name, destination_queue_id, termination_reason,
+        ivr_script_id, ivr_script_name, ivr_script_tag_id, ivr_script_tag_name,
+        last_activity_time, skills_assigned_in, created_at, raw_data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# GraphQL activity fields in task_activities column order (after id and task_id)
+TASK_ACTIVITY_FIELDS = (
+    'isActive', 'createdTime', 'endedTime', 'agentId', 'agentName', 'agentPhoneNumber',
+    'agentSessionId', 'agentChannelId', 'entrypointId', 'entrypointName', 'queueId',
+    'queueName', 'siteId', 'siteName', 'teamId', 'teamName', 'transferType',
+    'activityType', 'activityName', 'eventName', 'previousState', 'nextState',
+    'consultEpId', 'consultEpName', 'childContactId', 'childContactType', 'duration',
+    'destinationAgentPhoneNumber', 'destinationAgentId', 'destinationAgentName',
+    'destinationAgentSessionId', 'destinationAgentChannelId', 'destinationAgentTeamId',
+    'destinationAgentTeamName', 'destinationQueueName', 'destinationQueueId',
+    'terminationReason', 'ivrScriptId', 'ivrScriptName', 'ivrScriptTagId',
+    'ivrScriptTagName', 'lastActivityTime', 'skillsAssignedIn'
+)
+
+AGENT_SESSION_INSERT_SQL = '''
+    INSERT OR REPLACE INTO agent_sessions (
+        agent_session_id, agent_id, agent_name, user_login_id, site_id, site_name,
+        team_id, team_name, channel_id, channel_type, agent_phone_number, sub_channel_type, raw_data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# GraphQL session and channelInfo fields in agent_sessions column order
+AGENT_SESSION_FIELDS = (
+    'agentSessionId', 'agentId', 'agentName', 'userLoginId', 'siteId', 'siteName',
+    'teamId', 'teamName'
+)
+CHANNEL_INFO_FIELDS = ('channelId', 'channelType', 'agentPhoneNumber', 'subChannelType')
+
+AGENT_ACTIVITY_INSERT_SQL = '''
+    INSERT INTO agent_activities (
+        agent_session_id, agent_id, start_time, end_time, duration, state,
+        idle_code_id, idle_code_name, task_id, queue_id, queue_name,
+        wrapup_code_id, wrapup_code_name, is_outdial, outbound_type,
+        is_current_activity, is_login_activity, is_logout_activity,
+        changed_by_id, changed_by_name, raw_data
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Flat GraphQL agent activity fields either side of the nested idleCode/queue/wrapupCode columns
+AGENT_ACTIVITY_TIMING_FIELDS = ('agentId', 'startTime', 'endTime', 'duration', 'state')
+AGENT_ACTIVITY_STATUS_FIELDS = (
+    'isOutdial', 'outboundType', 'isCurrentActivity', 'isLoginActivity', 'isLogoutActivity',
+    'changedById', 'changedByName'
+)
+
+AGGREGATION_INSERT_SQL = '''
+    INSERT INTO task_aggregations (
+        query_name, aggregation_name, aggregation_value,
+        group_by_field, group_by_value, time_period_start, time_period_end
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+# zlib level for compressed raw_data - low levels already shrink JSON several times over
+RAW_DATA_COMPRESSION_LEVEL = 3
+
+def decode_raw_data(raw_data) -> Optional[Dict]:
+    """Decode a raw_data column value, whether stored as JSON text or a compressed BLOB"""
+    if raw_data is None:
+        return None
+    if isinstance(raw_data, bytes):
+        raw_data = zlib.decompress(raw_data)
+    return orjson.loads(raw_data)
+
 #  Manages Authentication, REST API and error handling with WxCC APIs
 class WebexCCGraphQLClient:
-    def __init__(self, base_url: str, access_token: str, org_id: str):
+    def __init__(self, base_url: str, access_token: str, org_id: Optional[str] = None):
         """
         Initialize the Webex Contact Center GraphQL client
         
         Args:
             base_url: The Webex CC API base URL (e.g., https://api.wxcc-us1.cisco.com)
             access_token: OAuth2 access token
-            org_id: Organization ID
+            org_id: Organization ID; taken from the suffix of the access token when omitted
         """
         self.base_url = base_url.rstrip('/')
         self.access_token = access_token
+        if not org_id:
+            # Tokens carry the org ID as their last '_' segment; anything else needs it passed in
+            if '_' not in access_token or not access_token.rsplit('_', 1)[-1]:
+                raise ValueError("Organization ID is required when it is not part of the access token")
+            org_id = access_token.rsplit('_', 1)[-1]
         self.org_id = org_id
         self.search_url = f"{self.base_url}/search"
         self.headers = {
@@ -49,6 +148,20 @@ class WebexCCGraphQLClient:
             'Accept': 'application/json'
         }
         
+        # Reuse one keep-alive connection pool for every query, retrying transient
+        # failures with backoff so one bad response doesn't abort the whole window
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST"]
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
     def execute_query(self, query: str, variables: Optional[Dict] = None) -> Dict:
         """
         Execute a GraphQL query against the Webex CC Search API
@@ -68,15 +181,14 @@ class WebexCCGraphQLClient:
         logger.info(f"Executing GraphQL query: {query[:100]}...")
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.search_url,
-                headers=self.headers,
-                json=payload,
+                data=orjson.dumps(payload),
                 timeout=30
             )
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             
             if 'errors' in result:
                 logger.error(f"GraphQL errors: {result['errors']}")
@@ -93,16 +205,41 @@ class WebexCCGraphQLClient:
 
 #  Manages SQLLITE DB, builds tables and inserts data
 class SQLiteManager:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, bulk_rebuild: bool = False,
+                 store_raw_data: bool = True, compress_raw_data: bool = False):
         """
         Initialize SQLite database manager
         
         Args:
             db_path: Path to SQLite database file
+            bulk_rebuild: Disable the rollback journal while loading a fresh database;
+                a failed load is discarded so a re-run starts from scratch
+            store_raw_data: Keep the raw GraphQL record in the raw_data columns;
+                when False they are left NULL and no serialization is done
+            compress_raw_data: Store raw_data as zlib-compressed JSON BLOBs
+                (read back with decode_raw_data) instead of JSON text
         """
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        self.store_raw_data = store_raw_data
+        self.compress_raw_data = compress_raw_data
+        # A new database file has no earlier loads that a journal-less failure could damage
+        self.fresh_db = db_path == ':memory:' or not os.path.exists(db_path)
+        # Without a journal a failed load can't be rolled back, so never risk earlier runs' data
+        if bulk_rebuild and not self.fresh_db:
+            logger.warning(f"Ignoring bulk_rebuild: {db_path} already holds data from earlier runs")
+        self.bulk_rebuild = bulk_rebuild and self.fresh_db
+        # apsw runs in autocommit mode - transactions are managed explicitly by the caller
+        self.conn = apsw.Connection(db_path, statementcachesize=256)
+        # Multi-statement execute only runs past a row-returning PRAGMA as it is consumed
+        self.conn.execute("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA cache_size = -65536;
+            PRAGMA foreign_keys = OFF;
+        """).fetchall()
+        if self.bulk_rebuild:
+            self.conn.execute("PRAGMA journal_mode = OFF").fetchall()
         self.create_tables()
         
     def create_tables(self):
@@ -237,97 +374,61 @@ class SQLiteManager:
             )
         ''')
         
-        self.conn.commit()
         logger.info("Database tables created/verified")
         
+    def encode_raw_data(self, record: Dict):
+        """Serialize a record for the raw_data column"""
+        if not self.store_raw_data:
+            return None
+        if self.compress_raw_data:
+            return zlib.compress(orjson.dumps(record), RAW_DATA_COMPRESSION_LEVEL)
+        return orjson.dumps(record).decode()
+        
+    def get_task_raw_data(self, task_id: str) -> Optional[Dict]:
+        """Return the raw GraphQL record stored for a task"""
+        row = self.conn.execute('SELECT raw_data FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return decode_raw_data(row[0]) if row else None
+        
+    def create_indexes(self):
+        """Create secondary indexes - run after the bulk load so each index is built in one pass"""
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS ix_task_activities_task_id ON task_activities (task_id);
+            CREATE INDEX IF NOT EXISTS ix_task_activities_agent_session_id ON task_activities (agent_session_id);
+            CREATE INDEX IF NOT EXISTS ix_agent_activities_agent_session_id ON agent_activities (agent_session_id);
+        ''')
+        logger.info("Database indexes created/verified")
+        
     def insert_tasks(self, tasks_data: List[Dict]):
         """Insert task data into the database"""
-        cursor = self.conn.cursor()
+        # Build all rows up front so each table is written with a single executemany
+        task_rows = []
+        activity_rows = []
         
         for task in tasks_data:
-            # Insert the main task record
-            cursor.execute('''
-                INSERT OR REPLACE INTO tasks (id, raw_data)
-                VALUES (?, ?)
-            ''', (
-                task.get('id'),
-                json.dumps(task)
-            ))
+            task_id = task.get('id')
+            task_rows.append((task_id, self.encode_raw_data(task)))
             
-            # Insert task activities
             if 'activities' in task and 'nodes' in task['activities']:
-                for activity in task['activities']['nodes']:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO task_activities (
-                            id, task_id, is_active, created_time, ended_time, agent_id, agent_name,
-                            agent_phone_number, agent_session_id, agent_channel_id, entrypoint_id,
-                            entrypoint_name, queue_id, queue_name, site_id, site_name, team_id,
-                            team_name, transfer_type, activity_type, activity_name, event_name,
-                            previous_state, next_state, consult_ep_id, consult_ep_name,
-                            child_contact_id, child_contact_type, duration,
-                            destination_agent_phone_number, destination_agent_id, destination_agent_name,
-                            destination_agent_session_id, destination_agent_channel_id,
-                            destination_agent_team_id, destination_agent_team_name,
-                            destination_queue_name, destination_queue_id, termination_reason,
-                            ivr_script_id, ivr_script_name, ivr_script_tag_id, ivr_script_tag_name,
-                            last_activity_time, skills_assigned_in, created_at, raw_data
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
+                activity_rows.extend(
+                    (
                         activity.get('id'),
-                        task.get('id'),
-                        activity.get('isActive'),
-                        activity.get('createdTime'),
-                        activity.get('endedTime'),
-                        activity.get('agentId'),
-                        activity.get('agentName'),
-                        activity.get('agentPhoneNumber'),
-                        activity.get('agentSessionId'),
-                        activity.get('agentChannelId'),
-                        activity.get('entrypointId'),
-                        activity.get('entrypointName'),
-                        activity.get('queueId'),
-                        activity.get('queueName'),
-                        activity.get('siteId'),
-                        activity.get('siteName'),
-                        activity.get('teamId'),
-                        activity.get('teamName'),
-                        activity.get('transferType'),
-                        activity.get('activityType'),
-                        activity.get('activityName'),
-                        activity.get('eventName'),
-                        activity.get('previousState'),
-                        activity.get('nextState'),
-                        activity.get('consultEpId'),
-                        activity.get('consultEpName'),
-                        activity.get('childContactId'),
-                        activity.get('childContactType'),
-                        activity.get('duration'),
-                        activity.get('destinationAgentPhoneNumber'),
-                        activity.get('destinationAgentId'),
-                        activity.get('destinationAgentName'),
-                        activity.get('destinationAgentSessionId'),
-                        activity.get('destinationAgentChannelId'),
-                        activity.get('destinationAgentTeamId'),
-                        activity.get('destinationAgentTeamName'),
-                        activity.get('destinationQueueName'),
-                        activity.get('destinationQueueId'),
-                        activity.get('terminationReason'),
-                        activity.get('ivrScriptId'),
-                        activity.get('ivrScriptName'),
-                        activity.get('ivrScriptTagId'),
-                        activity.get('ivrScriptTagName'),
-                        activity.get('lastActivityTime'),
-                        activity.get('skillsAssignedIn'),
+                        task_id,
+                        *map(activity.get, TASK_ACTIVITY_FIELDS),
                         None,  # created_at will use DEFAULT CURRENT_TIMESTAMP
-                        json.dumps(activity)
-                    ))
+                        self.encode_raw_data(activity)
+                    )
+                    for activity in task['activities']['nodes']
+                )
+        
+        self.conn.executemany(TASK_INSERT_SQL, task_rows)
+        self.conn.executemany(TASK_ACTIVITY_INSERT_SQL, activity_rows)
         
-        self.conn.commit()
         logger.info(f"Inserted {len(tasks_data)} task records")
         
     def insert_agent_sessions(self, sessions_data: List[Dict]):
-        """Insert agent session data into the database"""
-        cursor = self.conn.cursor()
+        """Insert agent session data and their agent activities into the database"""
+        session_rows = []
+        session_activities = []
         
         for session in sessions_data:
             # Get the first channel info if it's a list
@@ -337,106 +438,100 @@ class SQLiteManager:
             elif not isinstance(channel_info, dict):
                 channel_info = {}
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO agent_sessions (
-                    agent_session_id, agent_id, agent_name, user_login_id, site_id, site_name,
-                    team_id, team_name, channel_id, channel_type, agent_phone_number, sub_channel_type, raw_data
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                session.get('agentSessionId'),
-                session.get('agentId'),
-                session.get('agentName'),
-                session.get('userLoginId'),
-                session.get('siteId'),
-                session.get('siteName'),
-                session.get('teamId'),
-                session.get('teamName'),
-                channel_info.get('channelId'),
-                channel_info.get('channelType'),
-                channel_info.get('agentPhoneNumber'),
-                channel_info.get('subChannelType'),
-                json.dumps(session)
+            session_rows.append((
+                *map(session.get, AGENT_SESSION_FIELDS),
+                *map(channel_info.get, CHANNEL_INFO_FIELDS),
+                self.encode_raw_data(session)
             ))
             
-            # Insert activities if present
+            # Collect activities so all sessions' activities go out in one executemany
             if channel_info.get('activities', {}).get('nodes'):
-                activities = channel_info['activities']['nodes']
-                self.insert_agent_activities(session.get('agentSessionId'), activities)
+                session_activities.append((session.get('agentSessionId'), channel_info['activities']['nodes']))
+        
+        self.conn.executemany(AGENT_SESSION_INSERT_SQL, session_rows)
+        self.insert_agent_activities(session_activities)
         
-        self.conn.commit()
         logger.info(f"Inserted {len(sessions_data)} agent session records")
         
-    def insert_agent_activities(self, agent_session_id: str, activities_data: List[Dict]):
-        """Insert agent activity data into the database"""
+    def insert_agent_activities(self, session_activities: List[tuple]):
+        """Insert agent activity data from (agent_session_id, activities) pairs with a single executemany"""
         cursor = self.conn.cursor()
         
-        for activity in activities_data:
-            cursor.execute('''
-                INSERT INTO agent_activities (
-                    agent_session_id, agent_id, start_time, end_time, duration, state,
-                    idle_code_id, idle_code_name, task_id, queue_id, queue_name,
-                    wrapup_code_id, wrapup_code_name, is_outdial, outbound_type,
-                    is_current_activity, is_login_activity, is_logout_activity,
-                    changed_by_id, changed_by_name, raw_data
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                agent_session_id,
-                activity.get('agentId'),
-                activity.get('startTime'),
-                activity.get('endTime'),
-                activity.get('duration'),
-                activity.get('state'),
-                activity.get('idleCode', {}).get('id') if activity.get('idleCode') else None,
-                activity.get('idleCode', {}).get('name') if activity.get('idleCode') else None,
-                activity.get('taskId'),
-                activity.get('queue', {}).get('id') if activity.get('queue') else None,
-                activity.get('queue', {}).get('name') if activity.get('queue') else None,
-                activity.get('wrapupCode', {}).get('id') if activity.get('wrapupCode') else None,
-                activity.get('wrapupCode', {}).get('name') if activity.get('wrapupCode') else None,
-                activity.get('isOutdial'),
-                activity.get('outboundType'),
-                activity.get('isCurrentActivity'),
-                activity.get('isLoginActivity'),
-                activity.get('isLogoutActivity'),
-                activity.get('changedById'),
-                activity.get('changedByName'),
-                json.dumps(activity)
-            ))
+        cursor.executemany(AGENT_ACTIVITY_INSERT_SQL, (
+            self.agent_activity_row(agent_session_id, activity)
+            for agent_session_id, activities in session_activities
+            for activity in activities
+        ))
+        
+    def agent_activity_row(self, agent_session_id: str, activity: Dict) -> tuple:
+        """Build the agent_activities row for one activity"""
+        idle_code = activity.get('idleCode') or {}
+        queue = activity.get('queue') or {}
+        wrapup_code = activity.get('wrapupCode') or {}
+        
+        return (
+            agent_session_id,
+            *map(activity.get, AGENT_ACTIVITY_TIMING_FIELDS),
+            idle_code.get('id'),
+            idle_code.get('name'),
+            activity.get('taskId'),
+            queue.get('id'),
+            queue.get('name'),
+            wrapup_code.get('id'),
+            wrapup_code.get('name'),
+            *map(activity.get, AGENT_ACTIVITY_STATUS_FIELDS),
+            self.encode_raw_data(activity)
+        )
         
-        self.conn.commit()
+    def insert_aggregations(self, query_name: str, grouped_aggregations: List[tuple],
+                            time_start: int, time_end: int):
+        """
+        Insert aggregation results for several groups with a single executemany
         
-    def insert_aggregations(self, query_name: str, aggregations: List[Dict], 
-                          time_start: int, time_end: int, group_by_data: Dict = None):
-        """Insert aggregation results into the database"""
+        Args:
+            query_name: Name recorded against every aggregation row
+            grouped_aggregations: (group_by_data, aggregations) pairs
+            time_start: Start of the aggregated time range in epoch milliseconds
+            time_end: End of the aggregated time range in epoch milliseconds
+        """
         cursor = self.conn.cursor()
         
-        for agg in aggregations:
-            cursor.execute('''
-                INSERT INTO task_aggregations (
-                    query_name, aggregation_name, aggregation_value,
-                    group_by_field, group_by_value, time_period_start, time_period_end
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                query_name,
-                agg.get('name'),
-                agg.get('value'),
-                group_by_data.get('field') if group_by_data else None,
-                group_by_data.get('value') if group_by_data else None,
-                time_start,
-                time_end
-            ))
+        aggregation_rows = [
+            (query_name, agg.get('name'), agg.get('value'),
+             group_by_data.get('field') if group_by_data else None,
+             group_by_data.get('value') if group_by_data else None,
+             time_start, time_end)
+            for group_by_data, aggregations in grouped_aggregations
+            for agg in aggregations
+        ]
         
-        self.conn.commit()
+        cursor.executemany(AGGREGATION_INSERT_SQL, aggregation_rows)
+        
+    def discard(self):
+        """Close the connection and delete a partially built bulk_rebuild database"""
+        self.conn.close()
+        self.conn = None
+        if self.db_path != ':memory:':
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(self.db_path + suffix):
+                    os.remove(self.db_path + suffix)
+        logger.info(f"Discarded partially built database {self.db_path}")
         
     def close(self):
         """Close database connection"""
+        if self.conn is None:
+            return
+        if self.bulk_rebuild:
+            self.conn.execute("PRAGMA journal_mode = WAL").fetchall()
         self.conn.close()
 
 #  Contains GraphQL queries for table data
 class WebexCCDataExtractor:
-    def __init__(self, client: WebexCCGraphQLClient, db_manager: SQLiteManager):
+    def __init__(self, client: WebexCCGraphQLClient, db_manager: SQLiteManager, days_back: int = 7):
         self.client = client
         self.db = db_manager
+        # One shared window so tasks, sessions and aggregations line up
+        self.start_time, self.end_time = self.get_time_range(days_back)
         
     def get_time_range(self, days_back: int = 7) -> tuple:
         """Get time range in epoch milliseconds"""
@@ -448,13 +543,57 @@ class WebexCCDataExtractor:
         
         return start_epoch, end_epoch
         
-    def extract_tasks(self, days_back: int = 7):
+    def resolve_time_range(self, days_back: Optional[int] = None) -> tuple:
+        """Return the shared extraction window, or a fresh one when days_back is given"""
+        if days_back is None:
+            return self.start_time, self.end_time
+        return self.get_time_range(days_back)
+        
+    def fetch_pages(self, query: str, root_field: str, items_field: str,
+                    start_time: int, end_time: int):
+        """
+        Yield one page of results at a time, following the pageInfo cursor
+        
+        Args:
+            query: GraphQL query taking $from, $to and $cursor variables
+            root_field: Top level field of the response (e.g. taskDetails)
+            items_field: List field holding the page's records (e.g. tasks)
+            start_time: Start of the time range in epoch milliseconds
+            end_time: End of the time range in epoch milliseconds
+        """
+        # A single worker fetches the next page while the caller inserts the current one;
+        # all database writes stay on the calling thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            cursor = "0"
+            variables = {'from': start_time, 'to': end_time, 'cursor': cursor}
+            future = executor.submit(self.client.execute_query, query, variables)
+            
+            while future is not None:
+                result = future.result()
+                future = None
+                
+                if root_field not in result or items_field not in result[root_field]:
+                    return
+                
+                page_info = result[root_field].get('pageInfo') or {}
+                if page_info.get('hasNextPage'):
+                    # Re-requesting without a new cursor would fetch the same page forever
+                    next_cursor = page_info.get('endCursor')
+                    if not next_cursor or next_cursor == cursor:
+                        raise Exception(f"{root_field} reported another page without a new endCursor (cursor {cursor!r})")
+                    cursor = next_cursor
+                    variables = {'from': start_time, 'to': end_time, 'cursor': cursor}
+                    future = executor.submit(self.client.execute_query, query, variables)
+                
+                yield result[root_field][items_field]
+        
+    def extract_tasks(self, days_back: Optional[int] = None):
         """Extract task data from Webex CC"""
-        start_time, end_time = self.get_time_range(days_back)
+        start_time, end_time = self.resolve_time_range(days_back)
         
         query = """
-        {
-            taskDetails(from: %d, to: %d) {
+        query Tasks($from: Long!, $to: Long!, $cursor: String) {
+            taskDetails(from: $from, to: $to, pagination: { cursor: $cursor }) {
                 tasks {
                     id
                     activities {
@@ -517,26 +656,26 @@ class WebexCCDataExtractor:
                 }
             }
         }
-        """ % (start_time, end_time)
+        """
         
-        result = self.client.execute_query(query)
+        task_count = 0
         
-        if 'taskDetails' in result and 'tasks' in result['taskDetails']:
-            tasks = result['taskDetails']['tasks']
+        for tasks in self.fetch_pages(query, 'taskDetails', 'tasks', start_time, end_time):
             logger.info(f"Retrieved {len(tasks)} tasks")
             
             if tasks:
                 self.db.insert_tasks(tasks)
+            task_count += len(tasks)
                 
-        return len(tasks) if 'taskDetails' in result and 'tasks' in result['taskDetails'] else 0
+        return task_count
         
-    def extract_agent_sessions(self, days_back: int = 7):
+    def extract_agent_sessions(self, days_back: Optional[int] = None):
         """Extract agent session data from Webex CC"""
-        start_time, end_time = self.get_time_range(days_back)
+        start_time, end_time = self.resolve_time_range(days_back)
         
         query = """
-        {
-            agentSession(from: %d, to: %d) {
+        query AgentSessions($from: Long!, $to: Long!, $cursor: String) {
+            agentSession(from: $from, to: $to, pagination: { cursor: $cursor }) {
                 agentSessions {
                     agentSessionId
                     agentId
@@ -588,28 +727,28 @@ class WebexCCDataExtractor:
                 }
             }
         }
-        """ % (start_time, end_time)
+        """
         
-        result = self.client.execute_query(query)
+        session_count = 0
         
-        if 'agentSession' in result and 'agentSessions' in result['agentSession']:
-            sessions = result['agentSession']['agentSessions']
+        for sessions in self.fetch_pages(query, 'agentSession', 'agentSessions', start_time, end_time):
             logger.info(f"Retrieved {len(sessions)} agent sessions")
             
             if sessions:
                 self.db.insert_agent_sessions(sessions)
+            session_count += len(sessions)
                 
-        return len(sessions) if 'agentSession' in result and 'agentSessions' in result['agentSession'] else 0
+        return session_count
         
-    def extract_task_aggregations(self, days_back: int = 7):
+    def extract_task_aggregations(self, days_back: Optional[int] = None):
         """Extract task aggregation data from Webex CC"""
-        start_time, end_time = self.get_time_range(days_back)
+        start_time, end_time = self.resolve_time_range(days_back)
         
         query = """
-        {
+        query TaskAggregations($from: Long!, $to: Long!) {
             taskDetails(
-                from: %d,
-                to: %d,
+                from: $from,
+                to: $to,
                 filter: {
                     and: [
                         { direction: { equals: "inbound" } }
@@ -640,26 +779,24 @@ class WebexCCDataExtractor:
                 }
             }
         }
-        """ % (start_time, end_time)
+        """
         
-        result = self.client.execute_query(query)
+        result = self.client.execute_query(query, {'from': start_time, 'to': end_time})
         
         if 'taskDetails' in result and 'tasks' in result['taskDetails']:
             tasks = result['taskDetails']['tasks']
             
-            for task in tasks:
-                if 'aggregation' in task:
-                    group_by_data = {
-                        'field': 'owner_id',
-                        'value': task.get('owner', {}).get('id')
-                    }
-                    self.db.insert_aggregations(
-                        'task_statistics_by_agent',
-                        task['aggregation'],
-                        start_time,
-                        end_time,
-                        group_by_data
-                    )
+            grouped_aggregations = [
+                ({'field': 'owner_id', 'value': task.get('owner', {}).get('id')}, task['aggregation'])
+                for task in tasks
+                if 'aggregation' in task
+            ]
+            self.db.insert_aggregations(
+                'task_statistics_by_agent',
+                grouped_aggregations,
+                start_time,
+                end_time
+            )
                     
             logger.info(f"Inserted aggregations for {len(tasks)} agents")
             
@@ -676,32 +813,51 @@ def main():
             CONFIG['org_id']
         )
         
-        db_manager = SQLiteManager(CONFIG['db_path'])
-        extractor = WebexCCDataExtractor(client, db_manager)
+        db_manager = SQLiteManager(
+            CONFIG['db_path'],
+            bulk_rebuild=CONFIG['bulk_rebuild'],
+            store_raw_data=CONFIG['store_raw_data'],
+            compress_raw_data=CONFIG['compress_raw_data']
+        )
+        extractor = WebexCCDataExtractor(client, db_manager, CONFIG['days_back'])
         
         # Extract data
         logger.info(f"Starting data extraction for last {CONFIG['days_back']} days")
         
+        # Write everything in one transaction - one journal sync instead of one per insert
+        db_manager.conn.execute("BEGIN IMMEDIATE")
+        
         # Extract tasks
         logger.info("Extracting task data...")
-        task_count = extractor.extract_tasks(CONFIG['days_back'])
+        task_count = extractor.extract_tasks()
         logger.info(f"Extracted {task_count} tasks")
         
         # Extract agent sessions
         logger.info("Extracting agent session data...")
-        session_count = extractor.extract_agent_sessions(CONFIG['days_back'])
+        session_count = extractor.extract_agent_sessions()
         logger.info(f"Extracted {session_count} agent sessions")
         
         # Extract aggregations
         logger.info("Extracting task aggregations...")
-        agg_count = extractor.extract_task_aggregations(CONFIG['days_back'])
+        agg_count = extractor.extract_task_aggregations()
         logger.info(f"Extracted aggregations for {agg_count} agents")
         
+        db_manager.conn.execute("COMMIT")
+        
+        # Index once the data is in place rather than maintaining indexes row by row
+        db_manager.create_indexes()
+        
         logger.info(f"Data extraction completed successfully!")
         logger.info(f"Database saved to: {CONFIG['db_path']}")
         
     except Exception as e:
         logger.error(f"Data extraction failed: {e}")
+        if 'db_manager' in locals():
+            if db_manager.bulk_rebuild:
+                # ROLLBACK is undefined with the journal off - start over from an empty file instead
+                db_manager.discard()
+            elif db_manager.conn.in_transaction:
+                db_manager.conn.execute("ROLLBACK")
         raise
     finally:
         if 'db_manager' in locals():